@@ -1,6 +1,14 @@
 from __future__ import annotations
 
-from flask import Flask, jsonify, render_template, request
+import copy
+import hashlib
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+
+import orjson
+from flask import Flask, render_template, request
 
 from nd_prover import *
 
@@ -12,6 +20,29 @@ app = Flask(
     static_url_path="/static",
 )
 
+# Checked proof states keyed by a rolling digest of the problem and lines
+PROOF_CACHE_SIZE = 256
+_proof_cache = OrderedDict()
+_proof_cache_lock = threading.Lock()
+
+# Rendered HTML of the static site pages, keyed by template name
+_page_cache = {}
+
+# Constant body of a successful /api/validate-problem response
+VALIDATE_OK_BODY = orjson.dumps({"ok": True, "status": "ok", "message": ""})
+
+LinePayload = namedtuple(
+    "LinePayload", "kind line_no formula_text just_text"
+)
+
+# Problem edits performed for each line kind sent by the frontend
+_LINE_EDITS = {
+    "assumption": Problem.begin_subproof,
+    "end_and_begin": Problem.end_and_begin_subproof,
+    "line": Problem.add_line,
+    "close_subproof": Problem.end_subproof,
+}
+
 
 @app.after_request
 def add_cache_control(response):
@@ -28,9 +59,57 @@ def add_cache_control(response):
     return response
 
 
+def _json_response(body: bytes, code: int = 200):
+    """Return a JSON response for an already encoded body."""
+    return app.response_class(body, status=code, mimetype="application/json")
+
+
 def _json_error(message: str, *, status: str = "error", code: int = 400):
     """Return a standardized JSON error response."""
-    return jsonify({"ok": False, "status": status, "message": message}), code
+    body = orjson.dumps({"ok": False, "status": status, "message": message})
+    return _json_response(body, code)
+
+
+def _line_error(line_no, error):
+    """Return a JSON error response for an error on the given proof line."""
+    prefix = f"Line {line_no}: " if line_no is not None else ""
+    return _json_error(prefix + str(error))
+
+
+def _render_page(template_name):
+    """Render a site page, reusing the rendered HTML outside debug mode.
+    
+    Pages only depend on the request path of their own route, so the
+    rendered output never changes between requests.
+    """
+    if app.debug:
+        return render_template(template_name)
+    html = _page_cache.get(template_name)
+    if html is None:
+        html = render_template(template_name).encode()
+        _page_cache[template_name] = html
+    return app.response_class(html, mimetype="text/html")
+
+
+def _load_json():
+    """Decode the JSON request body, or return None if it is invalid.
+    
+    Requests that are not sent as JSON, or that have an empty body, decode
+    to {} and are left to each endpoint's own field validation. A JSON
+    body that is malformed or not an object is invalid. The body is read
+    once without caching it on the request, since each API endpoint only
+    decodes it a single time.
+    """
+    if not request.is_json:
+        return {}
+    body = request.get_data(cache=False)
+    if not body:
+        return {}
+    try:
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
 
 
 def _extract_problem_fields(data):
@@ -43,13 +122,142 @@ def _extract_problem_fields(data):
 
 def _resolve_logic(logic_name):
     """Resolve the logic implementation from its label, or return an error message."""
-    logic = logics.get(logic_name)
+    logic = logics.get(logic_name) or _logics_ci.get(logic_name.casefold())
     if logic is None:
         message = f'Logic not recognized: "{logic_name}".'
         return None, message
     return logic, None
 
 
+def _extract_line_payloads(data):
+    """Extract the proof lines of a JSON payload as LinePayload tuples."""
+    return [
+        LinePayload(
+            p.get("kind"),
+            p.get("lineNumber"),
+            (p.get("formulaText") or "").strip(),
+            (p.get("justText") or "").strip(),
+        )
+        for p in data.get("lines") or []
+    ]
+
+
+@lru_cache(maxsize=512)
+def _problem_template(logic, premises_text, conclusion_text):
+    """Return an empty Problem for the given fields, to be copied before use."""
+    premises = parse_and_verify_premises(premises_text, logic)
+    conclusion = parse_and_verify_formula(conclusion_text, logic)
+    return Problem(logic, premises, conclusion)
+
+
+@lru_cache(maxsize=256)
+def _validate_problem_fields(logic_name, premises_text, conclusion_text):
+    """Validate the problem fields, returning an (ok, message) pair.
+    
+    The problem editor validates on every keystroke, so results are cached
+    by the raw field values.
+    """
+    logic, error_message = _resolve_logic(logic_name)
+    if logic is None:
+        return False, error_message
+
+    try:
+        parse_and_verify_premises(premises_text, logic)
+    except ParsingError as e:
+        return False, f"Invalid premise(s): {e}"
+
+    if not conclusion_text.strip():
+        return False, "Invalid conclusion: A conclusion must be provided."
+
+    try:
+        parse_and_verify_formula(conclusion_text, logic)
+    except ParsingError as e:
+        return False, f"Invalid conclusion: {e}"
+    except Exception as e:
+        return False, str(e)
+
+    return True, ""
+
+
+def _line_digests(logic_name, premises_text, conclusion_text, payloads):
+    """Return rolling digests of the problem followed by each line prefix.
+    
+    The digest at index i identifies the problem together with the first
+    i lines, so a proof that only gained new lines shares its prefixes.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for text in (logic_name, premises_text, conclusion_text):
+        h.update(text.encode())
+        h.update(b"\0")
+
+    digests = [h.hexdigest()]
+    for p in payloads:
+        for text in (p.kind, p.formula_text, p.just_text):
+            h.update(str(text or "").encode())
+            h.update(b"\0")
+        digests.append(h.hexdigest())
+    return digests
+
+
+def _cached_problem(digests):
+    """Return a copy of the longest cached proof prefix and its length."""
+    with _proof_cache_lock:
+        for n in range(len(digests) - 1, -1, -1):
+            problem = _proof_cache.get(digests[n])
+            if problem is not None:
+                _proof_cache.move_to_end(digests[n])
+                break
+        else:
+            return None, 0
+    return copy.deepcopy(problem), n
+
+
+def _cache_problem(digest, problem):
+    """Store a checked proof state, evicting the least recently used one."""
+    with _proof_cache_lock:
+        _proof_cache[digest] = problem
+        _proof_cache.move_to_end(digest)
+        if len(_proof_cache) > PROOF_CACHE_SIZE:
+            _proof_cache.popitem(last=False)
+
+
+def _replay_premise(problem, payload):
+    """Premises are already encoded in the initial Problem context."""
+
+
+def _replay_assumption(problem, payload):
+    """Replay an assumption / end-and-begin line, which only carries a formula."""
+    if not payload.formula_text:
+        raise ProofEditError("Formula is missing.")
+    assumption = parse_assumption(payload.formula_text)
+    _LINE_EDITS[payload.kind](problem, assumption)
+
+
+def _replay_line(problem, payload):
+    """Replay a line that carries both a formula and a justification."""
+    if not payload.formula_text:
+        raise ProofEditError("Formula is missing.")
+    if not payload.just_text:
+        raise ProofEditError("Justification is missing.")
+    # The formula and justification are sent separately, so there is no
+    # need to join them into a raw line only for parse_line to split it.
+    formula = parse_formula(payload.formula_text)
+    justification = parse_justification(payload.just_text)
+
+    edit = _LINE_EDITS.get(payload.kind)
+    if edit is not None:
+        edit(problem, formula, justification)
+
+
+_LINE_REPLAYS = {
+    "premise": _replay_premise,
+    "assumption": _replay_assumption,
+    "end_and_begin": _replay_assumption,
+    "line": _replay_line,
+    "close_subproof": _replay_line,
+}
+
+
 def _serialize_proof(proof):
     """Serialize a Proof object to the frontend format.
     
@@ -115,109 +323,62 @@ def _serialize_proof(proof):
 
 @app.get("/")
 def index():
-    return render_template("index.html")
+    return _render_page("index.html")
 
 
 @app.get("/exercises/tfl")
 def exercises_tfl():
-    return render_template("exercises_tfl.html")
+    return _render_page("exercises_tfl.html")
 
 
 @app.get("/exercises/fol")
 def exercises_fol():
-    return render_template("exercises_fol.html")
+    return _render_page("exercises_fol.html")
 
 
 @app.get("/exercises/ml")
 def exercises_ml():
-    return render_template("exercises_ml.html")
+    return _render_page("exercises_ml.html")
 
 
 @app.get("/rules")
 def rules():
-    return render_template("rules.html")
+    return _render_page("rules.html")
 
 
 @app.post("/api/check-proof")
 def check_proof():
-    data = request.get_json(silent=True) or {}
+    data = _load_json()
+    if data is None:
+        return _json_error("Invalid JSON.")
     logic_name, premises_text, conclusion_text = _extract_problem_fields(data)
     logic, error_message = _resolve_logic(logic_name)
-    line_payloads = data.get("lines") or []
+    payloads = _extract_line_payloads(data)
 
     if logic is None:
         return _json_error(error_message)
 
-    try:
-        premises = parse_and_verify_premises(premises_text, logic)
-        conclusion = parse_and_verify_formula(conclusion_text, logic)
-    except ParsingError as e:
-        return _json_error(str(e))
-
-    problem = Problem(logic, premises, conclusion)
-
-    for payload in line_payloads:
-        kind = payload.get("kind")
-        raw = (payload.get("raw") or "").strip()
-        line_no = payload.get("lineNumber")
-        formula_text = (payload.get("formulaText") or "").strip()
-        just_text = (payload.get("justText") or "").strip()
-
-        prefix = f"Line {line_no}: " if line_no is not None else ""
-
-        # Premises are already encoded in the initial Problem context.
-        if kind == "premise":
-            continue
-
-        # Assumptions / end-and-begin only carry a formula.
-        if kind in {"assumption", "end_and_begin"}:
-            if not formula_text:
-                message = prefix + "Formula is missing."
-                return _json_error(message)
-            try:
-                assumption = parse_assumption(formula_text)
-            except ParsingError as e:
-                message = prefix + str(e)
-                return _json_error(message)
-
-            if kind == "assumption":
-                try:
-                    problem.begin_subproof(assumption)
-                except Exception as e:
-                    message = prefix + str(e)
-                    return _json_error(message)
-            else:  # end_and_begin
-                try:
-                    problem.end_and_begin_subproof(assumption)
-                except Exception as e:
-                    message = prefix + str(e)
-                    return _json_error(message)
-            continue
-
-        # All other kinds should have both formula and justification.
-        if not formula_text:
-            message = prefix + "Formula is missing."
-            return _json_error(message)
-        if not just_text:
-            message = prefix + "Justification is missing."
-            return _json_error(message)
-        if not raw:
-            raw = f"{formula_text}; {just_text}"
+    digests = _line_digests(
+        logic_name, premises_text, conclusion_text, payloads
+    )
+    problem, start = _cached_problem(digests)
 
+    if problem is None:
         try:
-            formula, justification = parse_line(raw)
+            template = _problem_template(logic, premises_text, conclusion_text)
         except ParsingError as e:
-            message = prefix + str(e)
-            return _json_error(message)
+            return _json_error(str(e))
+        problem = copy.deepcopy(template)
 
+    # Only lines past the cached prefix need to be replayed.
+    for payload in payloads[start:]:
+        replay = _LINE_REPLAYS.get(payload.kind, _replay_line)
         try:
-            if kind == "line":
-                problem.add_line(formula, justification)
-            elif kind == "close_subproof":
-                problem.end_subproof(formula, justification)
+            replay(problem, payload)
         except Exception as e:
-            message = prefix + str(e)
-            return _json_error(message)
+            return _line_error(payload.line_no, e)
+
+    _cache_problem(digests[-1], problem)
 
     if errors := problem.errors():
         message = "\n".join(errors)
@@ -231,7 +392,7 @@ def check_proof():
         message = "No errors yet, but the proof is incomplete!"
         status = "incomplete"
 
-    return jsonify(
+    body = orjson.dumps(
         {
             "ok": True,
             "status": status,
@@ -240,47 +401,32 @@ def check_proof():
             "proofString": str(problem),
         }
     )
+    return _json_response(body)
 
 
 @app.post("/api/validate-problem")
 def validate_problem():
-    data = request.get_json(silent=True) or {}
-    logic_name, premises_text, conclusion_text = _extract_problem_fields(data)
-    logic, error_message = _resolve_logic(logic_name)
-
-    if logic is None:
-        return _json_error(error_message)
-
-    try:
-        parse_and_verify_premises(premises_text, logic)
-    except ParsingError as e:
-        message = f"Invalid premise(s): {e}"
+    data = _load_json()
+    if data is None:
+        return _json_error("Invalid JSON.")
+    ok, message = _validate_problem_fields(*_extract_problem_fields(data))
+    if not ok:
         return _json_error(message)
 
-    if not conclusion_text.strip():
-        message = "Invalid conclusion: A conclusion must be provided."
-        return _json_error(message)
-
-    try:
-        parse_and_verify_formula(conclusion_text, logic)
-    except ParsingError as e:
-        message = f"Invalid conclusion: {e}"
-        return _json_error(message)
-    except Exception as e:
-        return _json_error(str(e))
-
-    return jsonify({"ok": True, "status": "ok", "message": ""})
+    return _json_response(VALIDATE_OK_BODY)
 
 
 @app.post("/api/generate-proof")
 def generate_proof():
-    data = request.get_json(silent=True) or {}
+    data = _load_json()
+    if data is None:
+        return _json_error("Invalid JSON.")
     logic_name, premises_text, conclusion_text = _extract_problem_fields(data)
     logic, error_message = _resolve_logic(logic_name)
 
     if logic is None:
         return _json_error(error_message)
-    if logic_name != "TFL":
+    if logic is not TFL:
         return _json_error("Proof generation is only supported for TFL.")
 
     try:
@@ -296,13 +442,25 @@ def generate_proof():
 
     proof_lines = _serialize_proof(problem.proof)
 
-    return jsonify({
+    body = orjson.dumps({
         "ok": True,
         "status": "complete",
         "message": "Proof complete! 🎉",
         "lines": proof_lines
     })
+    return _json_response(body)
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    port = int(os.environ.get("PORT", 5000))
+    if os.environ.get("USE_GUNICORN") == "1":
+        # Serve with gunicorn's threaded workers instead of the dev server.
+        # Each worker process has its own proof cache, so one process with
+        # more threads keeps a user's line-by-line checks on a warm cache;
+        # set WEB_CONCURRENCY to trade that for more processes.
+        os.execvp("gunicorn", [
+            "gunicorn", "-k", "gthread", "--threads", "8",
+            "--chdir", os.path.dirname(os.path.abspath(__file__)),
+            "-b", f"0.0.0.0:{port}", "app:app",
+        ])
+    app.run(host="0.0.0.0", port=port, debug=True)
@@ -12,9 +12,10 @@ from .checker import (
     Line, Proof, Problem, verify_arity, assumption_constants
 )
 from .cli import (
-    logics, parse_and_verify_formula, parse_and_verify_premises, 
-    select_logic, input_premises, input_conclusion, create_problem, 
-    select_edit, input_line, input_assumption, perform_edit, main
+    logics, _logics_ci, parse_and_verify_formula, split_top_level, 
+    parse_and_verify_premises, select_logic, input_premises, 
+    input_conclusion, create_problem, select_edit, input_line, 
+    input_assumption, perform_edit, main
 )
 from .parser import (
     ParsingError, Symbols, split_line, strip_parens, find_main_connective, 
@@ -24,15 +25,18 @@ from .parser import (
 )
 from .prover import (
     ProverError, _ProofObject, _Line, _Proof, Eliminator, Introducer, 
-    Prover, Processor, find_subproof, prove
+    Prover, Processor, find_subproof, _is_valid, prove
 )
 from .syntax import (
-    Metavar, Formula, Bot, Not, And, Or, Imp, Iff, Term, Func, Var, Pred, 
-    Eq, Forall, Exists, Box, Dia, BoxMarker, is_tfl_formula, 
-    is_fol_formula, is_fol_sentence, is_ml_formula, atomic_terms, 
-    constants, free_vars, sub_term
+    Metavar, cached_hash, Formula, Bot, Not, And, Or, Imp, Iff, Term, 
+    Func, Var, Pred, Eq, Forall, Exists, Box, Dia, BoxMarker, 
+    is_tfl_formula, is_fol_formula, is_fol_sentence, is_ml_formula, 
+    atomic_terms, constants, free_vars, sub_term
+)
+from .tfl_sat import (
+    prop_vars, evaluate, truth_table, truth_columns, countermodel, 
+    is_valid
 )
-from .tfl_sat import prop_vars, evaluate, countermodel, is_valid
 
 
 __all__ = [name for name in globals() if not name.startswith("__")]
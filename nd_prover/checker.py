@@ -20,8 +20,12 @@ class Rule:
     def __call__(self, *args, **kwargs):
         return self.func(*args, **kwargs)
 
+    def __deepcopy__(self, memo):
+        # Rules are compared by identity (e.g. `rule is Rules.AS`)
+        return self
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class Justification:
     rule: Rule
     citations: tuple
@@ -39,6 +43,9 @@ class Justification:
                 j_list.append(f"{i}-{j}")
         return f"{self.rule}, {','.join(j_list)}"
 
+    def __deepcopy__(self, memo):
+        return self
+
 
 class Rules:
     PR = Rule("PR", None)
@@ -56,6 +63,11 @@ class Rules:
         return decorator
 
 
+# Justifications are frozen, so premises and assumptions share one each
+_premise = Justification(Rules.PR, ())
+_assumption = Justification(Rules.AS, ())
+
+
 class TFL:
     
     @Rules.add("X")
@@ -456,10 +468,10 @@ class FOMLS5(FOMLK, MLS5):
 class ProofObject:
 
     def is_line(self):
-        return isinstance(self, Line)
+        return type(self) is Line
 
     def is_subproof(self):
-        return isinstance(self, Proof)
+        return type(self) is Proof
 
     def is_strict_subproof(self):
         return self.is_subproof() and isinstance(self.assumption, BoxMarker)
@@ -503,35 +515,46 @@ class Proof(ProofObject):
         return end.formula
 
     def add_line(self, formula, justification):
-        if self.seq and (end := self.seq[-1]).is_subproof():
-            return end.add_line(formula, justification)
-        self._add_line_current(formula, justification)
+        self._active_subproof()._add_line_current(formula, justification)
 
     def begin_subproof(self, assumption):
-        if self.seq and (end := self.seq[-1]).is_subproof():
-            return end.begin_subproof(assumption)
-        self._begin_subproof_current(assumption)
+        self._active_subproof()._begin_subproof_current(assumption)
 
     def end_subproof(self, formula, justification):
-        if not (self.seq and (end := self.seq[-1]).is_subproof()):
-            raise ProofEditError("No active subproof to close.")
-        if end.seq[-1].is_subproof():
-            return end.end_subproof(formula, justification)
-        self._add_line_current(formula, justification)
+        proof = self._closing_subproof()
+        proof._add_line_current(formula, justification)
 
     def end_and_begin_subproof(self, assumption):
-        if not (self.seq and (end := self.seq[-1]).is_subproof()):
-            raise ProofEditError("No active subproof to close.")
-        if end.seq[-1].is_subproof():
-            return end.end_and_begin_subproof(assumption)
-        self._begin_subproof_current(assumption)
+        proof = self._closing_subproof()
+        proof._begin_subproof_current(assumption)
 
     def delete_line(self):
-        if not self.seq:
-            raise ProofEditError("No lines to delete.")
-        if (end := self.seq[-1]).is_subproof() and len(end.seq) != 1:
-            return end.delete_line()
-        self.seq.pop()
+        proof = self
+        while True:
+            if not proof.seq:
+                raise ProofEditError("No lines to delete.")
+            end = proof.seq[-1]
+            if not (end.is_subproof() and len(end.seq) != 1):
+                break
+            proof = end
+        proof.seq.pop()
+
+    def _active_subproof(self):
+        # Innermost open subproof, found by descending through the last
+        # object of each level
+        proof = self
+        while proof.seq and (end := proof.seq[-1]).is_subproof():
+            proof = end
+        return proof
+
+    def _closing_subproof(self):
+        # Proof whose last object is the innermost open subproof
+        if not (self.seq and self.seq[-1].is_subproof()):
+            raise ProofEditError("No active subproof to close.")
+        proof = self
+        while (end := proof.seq[-1]).seq[-1].is_subproof():
+            proof = end
+        return proof
 
     def errors(self):
         errors_list = []
@@ -544,8 +567,9 @@ class Proof(ProofObject):
             try:
                 citations = obj.justification.citations
                 strict = self.is_strict_subproof() and rule not in Rules.strict
-                premises = self.retrieve_citations(citations, obj.idx, strict)
-                scope = self.partition_scope(citations, obj.idx, strict)
+                available = self.scope(obj.idx, strict)
+                premises = self._retrieve_citations(citations, available)
+                scope = self._partition_scope(citations, available)
                 schemas = rule(premises, conclusion=obj.formula, scope=scope)
 
                 if not self.match_schemas(obj.formula, schemas):
@@ -557,6 +581,14 @@ class Proof(ProofObject):
 
     def retrieve_citations(self, citations, idx, strict=False):
         scope = self.scope(idx, strict)
+        return self._retrieve_citations(citations, scope)
+
+    def partition_scope(self, citations, idx, strict=False):
+        scope = self.scope(idx, strict)
+        return self._partition_scope(citations, scope)
+
+    def _retrieve_citations(self, citations, scope):
+        # errors() builds the scope once and shares it with _partition_scope
         idx_to_obj = {obj.idx: obj for obj in scope}
         premises = []
 
@@ -567,11 +599,11 @@ class Proof(ProofObject):
             premises.append(obj)
         return premises
 
-    def partition_scope(self, citations, idx, strict=False):
+    def _partition_scope(self, citations, scope):
         citations = set(citations)
         partitions, current = [], []
 
-        for obj in self.scope(idx, strict):
+        for obj in scope:
             current.append(obj)
             if obj.idx in citations:
                 partitions.append(current)
@@ -591,15 +623,19 @@ class Proof(ProofObject):
             seq.append(obj)
         return seq if strict else self.context + seq
 
+    def _next_idx(self):
+        # idx walks down to the last line, so evaluate it only once
+        idx = self.idx
+        return idx[1] + 1 if idx else len(self.context) + 1
+
     def _add_line_current(self, formula, justification):
-        idx = self.idx[1] + 1 if self.idx else len(self.context) + 1
+        idx = self._next_idx()
         line = Line(idx, formula, justification)
         self.seq.append(line)
 
     def _begin_subproof_current(self, assumption):
-        idx = self.idx[1] + 1 if self.idx else len(self.context) + 1
-        j = Justification(Rules.AS, ())
-        line = Line(idx, assumption, j)
+        idx = self._next_idx()
+        line = Line(idx, assumption, _assumption)
         subproof = Proof([line], self.context + self.seq)
         self.seq.append(subproof)
 
@@ -634,8 +670,7 @@ class Problem:
         context, idx = [], 1
         for p in premises:
             self.verify_formula(p)
-            j = Justification(Rules.PR, ())
-            context.append(Line(idx, p, j))
+            context.append(Line(idx, p, _premise))
             idx += 1
         
         self.premises = premises
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from .parser import *
 
 
@@ -14,7 +16,22 @@ logics = {
     "FOMLS5": FOMLS5,
 }
 
+# Case-insensitive lookup for user-entered logic names
+_logics_ci = {k.casefold(): v for k, v in logics.items()}
+
+LOGIC_PROMPT = f"Select logic ({', '.join(logics)}): "
+
+EDITS = (
+    "1 - Add a new line",
+    "2 - Begin a new subproof",
+    "3 - End the current subproof",
+    "4 - End the current subproof and begin a new one",
+    "5 - Delete the last line",
+)
+EDIT_MENU = "\n".join(EDITS) + "\n"
 
+
+@lru_cache(maxsize=4096)
 def parse_and_verify_formula(f, logic):
     f = parse_formula(f)
     if logic is TFL and is_tfl_formula(f):
@@ -28,34 +45,38 @@ def parse_and_verify_formula(f, logic):
     raise ParsingError(f'"{f}" is not a well-formed {logic.__name__} formula.')
 
 
+def split_top_level(s):
+    if "(" not in s:
+        # No nesting, so every separator is at the top level
+        return [p for p in map(str.strip, s.replace(";", ",").split(",")) if p]
+
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(s):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth = max(0, depth - 1)
+        elif depth == 0 and ch in ",;":
+            if part := s[start:i].strip():
+                parts.append(part)
+            start = i + 1
+    if tail := s[start:].strip():
+        parts.append(tail)
+    return parts
+
+
 def parse_and_verify_premises(s, logic):
     s = s.strip()
     if s == "NA":
         return []
-
-    def split_top_level(text):
-        parts, depth, start = [], 0, 0
-        for i, ch in enumerate(text):
-            if ch == "(":
-                depth += 1
-            elif ch == ")":
-                depth = max(0, depth - 1)
-            elif depth == 0 and ch in (",", ";"):
-                if part := text[start:i].strip():
-                    parts.append(part)
-                start = i + 1
-        if tail := text[start:].strip():
-            parts.append(tail)
-        return parts
-
     parts = split_top_level(s)
     return [parse_and_verify_formula(p, logic) for p in parts]
 
 
 def select_logic():
     while True:
-        raw = input(f"Select logic ({', '.join(logics)}): ")
-        logic = logics.get(raw.strip().upper())
+        raw = input(LOGIC_PROMPT).strip()
+        logic = logics.get(raw) or _logics_ci.get(raw.casefold())
         if logic is not None:
             return logic
         print("Logic not recognized. Please try again.")
@@ -87,19 +108,13 @@ def create_problem():
 
 
 def select_edit():
-    edits = (
-        "1 - Add a new line",
-        "2 - Begin a new subproof",
-        "3 - End the current subproof",
-        "4 - End the current subproof and begin a new one",
-        "5 - Delete the last line",
-    )
-
+    # The menu is shown once; invalid input only repeats the prompt
+    print(EDIT_MENU)
     while True:
-        raw = input("\n".join(edits) + "\n\nSelect edit: ")
+        raw = input("Select edit: ")
         if raw.strip().isdecimal() and 1 <= int(raw) <= 5:
             return int(raw)
-        print("Invalid edit. Please try again.\n")
+        print("Invalid edit. Please try again.")
 
 
 def input_line():
@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 
 from .checker import *
 
@@ -222,11 +223,13 @@ def _parse_formula(f):
     raise ParsingError(f'Formula "{f}" is not well-formed.')
 
 
+@lru_cache(maxsize=4096)
 def parse_formula(f):
     f = "".join(Symbols.sub(f).split())
     return _parse_formula(f)
 
 
+@lru_cache(maxsize=4096)
 def parse_assumption(a):
     a = "".join(Symbols.sub(a).split())
     if a == "☐":
@@ -247,6 +250,9 @@ def parse_citations(citations):
 
     c_list = []
     for c in citations.split(","):
+        if c.isdecimal():
+            c_list.append(int(c))
+            continue
         m = re.fullmatch(r"(\d+)-(\d+)", c)
         if m:
             pair = (int(m.group(1)), int(m.group(2)))
@@ -259,6 +265,7 @@ def parse_citations(citations):
     return tuple(c_list)
 
 
+@lru_cache(maxsize=4096)
 def parse_justification(j):
     parts = j.split(",", maxsplit=1)
     r = parse_rule(parts[0])
@@ -268,6 +275,7 @@ def parse_justification(j):
     return Justification(r, c)
 
 
+@lru_cache(maxsize=4096)
 def parse_line(line):
     f, j = split_line(line)
     return parse_formula(f), parse_justification(j)
@@ -1,4 +1,7 @@
 import time
+from collections import ChainMap
+from functools import lru_cache
+from operator import attrgetter
 
 from .checker import *
 from .tfl_sat import *
@@ -8,7 +11,18 @@ class ProverError(Exception):
     pass
 
 
+# Branches are ranked by IP lines first, then by total lines
+_cost = attrgetter("ip_count", "line_count")
+
+# Rule names used by _Line, resolved once for Processor.translate
+_rules = {"PR": Rules.PR, "AS": Rules.AS, **Rules.rules}
+
+# Formulas are immutable, so one Bot instance serves every goal and line
+_bot = Bot()
+
+
 class _ProofObject:
+    __slots__ = ("id",)
     count = 0
 
     def __init__(self):
@@ -16,14 +30,15 @@ class _ProofObject:
         self.id = _ProofObject.count
 
     def is_line(self):
-        return isinstance(self, _Line)
+        return type(self) is _Line
 
     def is_subproof(self):
-        return isinstance(self, _Proof)
+        return type(self) is _Proof
 
 
 @dataclass
 class _Line(_ProofObject):
+    __slots__ = ("formula", "rule", "citations", "is_assumption")
     formula: Formula
     rule: str
     citations: tuple
@@ -38,6 +53,10 @@ class _Line(_ProofObject):
 
 @dataclass
 class _Proof(_ProofObject):
+    __slots__ = (
+        "_seq", "goal", "formulas", "shapes", "assumptions", 
+        "line_count", "ip_count"
+    )
     _seq: list[_ProofObject]
     goal: Formula
 
@@ -55,16 +74,19 @@ class _Proof(_ProofObject):
         self.init()
 
     def init(self):
-        self.formulas = {
-            obj.formula 
-            for obj in self.seq 
-            if obj.is_line()
-        }
-        self.assumptions = {
+        # Maps each formula to the id of the first line deriving it
+        self.formulas = {}
+        # Groups lines by the main connective of their formula
+        self.shapes = {}
+        for obj in self.seq:
+            if obj.is_line():
+                self.formulas.setdefault(obj.formula, obj.id)
+                self.shapes.setdefault(type(obj.formula), []).append(obj)
+        self.assumptions = frozenset(
             obj.formula 
             for obj in self.seq 
             if obj.is_line() and obj.is_assumption
-        }
+        )
         self.line_count = sum(
             1 if obj.is_line() else obj.line_count 
             for obj in self.seq
@@ -75,15 +97,40 @@ class _Proof(_ProofObject):
             for obj in self.seq
         )
 
-    def copy(self):
-        return _Proof(self.seq, self.goal)
+    def copy(self, goal=None):
+        # Carry the cached aggregates over instead of rescanning seq, and
+        # skip __post_init__, which would only init() an empty seq
+        proof = _Proof.__new__(_Proof)
+        _ProofObject.__init__(proof)
+        proof._seq = self.seq[:]
+        proof.goal = self.goal if goal is None else goal
+        proof.formulas = self.formulas.copy()
+        proof.shapes = {k: v[:] for k, v in self.shapes.items()}
+        proof.assumptions = self.assumptions
+        proof.line_count = self.line_count
+        proof.ip_count = self.ip_count
+        return proof
+
+    def extend(self, *objs, goal=None):
+        proof = self.copy(goal)
+        proof.add(*objs)
+        return proof
+
+    def assign(self, other):
+        self._seq = other.seq
+        self.formulas = other.formulas
+        self.shapes = other.shapes
+        self.assumptions = other.assumptions
+        self.line_count = other.line_count
+        self.ip_count = other.ip_count
 
     def add(self, *objs):
         for obj in objs:
             if obj.is_line():
-                self.formulas.add(obj.formula)
+                self.formulas.setdefault(obj.formula, obj.id)
+                self.shapes.setdefault(type(obj.formula), []).append(obj)
                 if obj.is_assumption:
-                    self.assumptions.add(obj.formula)
+                    self.assumptions |= {obj.formula}
                 self.line_count += 1
                 if obj.rule == "IP":
                     self.ip_count += 1
@@ -92,6 +139,31 @@ class _Proof(_ProofObject):
                 self.ip_count += obj.ip_count
             self.seq.append(obj)
 
+    def truncate(self, n):
+        removed = self.seq[n:]
+        del self.seq[n:]
+        for obj in reversed(removed):
+            if obj.is_line():
+                if self.formulas[obj.formula] == obj.id:
+                    del self.formulas[obj.formula]
+                # Drop emptied buckets so shapes matches a fresh init()
+                shape = self.shapes[type(obj.formula)]
+                shape.pop()
+                if not shape:
+                    del self.shapes[type(obj.formula)]
+                if obj.is_assumption:
+                    self.assumptions = frozenset(
+                        line.formula 
+                        for line in self.seq 
+                        if line.is_line() and line.is_assumption
+                    )
+                self.line_count -= 1
+                if obj.rule == "IP":
+                    self.ip_count -= 1
+            else:
+                self.line_count -= obj.line_count
+                self.ip_count -= obj.ip_count
+
     def id_to_obj(self):
         id_to_obj = {}
         for obj in self.seq:
@@ -120,6 +192,7 @@ class _Proof(_ProofObject):
         end = self.seq[-1]
         if end.is_line() and end.rule == "R":
             self.seq.pop()
+            self.shapes[type(end.formula)].pop()
             self.line_count -= 1
             return end.citations[0]
         return end.id
@@ -127,9 +200,8 @@ class _Proof(_ProofObject):
     def commit_best_branch(self, branches):
         if not branches:
             return False
-        def key(p): return (p.ip_count, p.line_count)
         # FIX: consider copying seq
-        self.seq = min(branches, key=key).seq
+        self.assign(min(branches, key=_cost))
         return True
 
 
@@ -137,20 +209,17 @@ class Eliminator:
 
     @staticmethod
     def elim(prover):
+        rules = (
+            Eliminator.NotE, Eliminator.AndE, 
+            Eliminator.ImpE, Eliminator.IffE
+        )
+        # Each rule adds at most one line, after which R and X are
+        # rechecked so the goal is closed as early as possible
         while True:
-            if Eliminator.R(prover):
+            if Eliminator.R(prover) or Eliminator.X(prover):
                 return True
-            if Eliminator.X(prover):
-                return True
-            if Eliminator.NotE(prover):
-                continue
-            if Eliminator.AndE(prover):
-                continue
-            if Eliminator.ImpE(prover):
-                continue
-            if Eliminator.IffE(prover):
-                continue
-            return False
+            if not any(rule(prover) for rule in rules):
+                return False
 
     @staticmethod
     def R(prover):
@@ -159,44 +228,37 @@ class Eliminator:
             if end.formula == proof.goal and not end.is_assumption:
                 return True
 
-        for obj in proof.seq:
-            if obj.is_line() and obj.formula == proof.goal:
-                line = _Line(obj.formula, "R", (obj.id,))
-                proof.add(line)
-                return True
+        line_id = proof.formulas.get(proof.goal)
+        if line_id is not None:
+            line = _Line(proof.goal, "R", (line_id,))
+            proof.add(line)
+            return True
         return False
 
     @staticmethod
     def X(prover):
         proof = prover.proof
-        for obj in proof.seq:
-            if obj.is_line() and isinstance(obj.formula, Bot):
-                line = _Line(proof.goal, "X", (obj.id,))
-                proof.add(line)
-                return True
+        for obj in proof.shapes.get(Bot, ()):
+            line = _Line(proof.goal, "X", (obj.id,))
+            proof.add(line)
+            return True
         return False
 
     @staticmethod
     def NotE(prover):
         proof = prover.proof
-        for obj in proof.seq:
-            if not (obj.is_line() and isinstance(obj.formula, Not)):
-                continue
-
-            for obj2 in proof.seq:
-                if obj2.is_line() and obj2.formula == obj.formula.inner:
-                    line = _Line(Bot(), "¬E", (obj.id, obj2.id))
-                    proof.add(line)
-                    return True
+        for obj in proof.shapes.get(Not, ()):
+            inner_id = proof.formulas.get(obj.formula.inner)
+            if inner_id is not None:
+                line = _Line(_bot, "¬E", (obj.id, inner_id))
+                proof.add(line)
+                return True
         return False
 
     @staticmethod
     def AndE(prover):
         proof = prover.proof
-        for obj in proof.seq:
-            if not (obj.is_line() and isinstance(obj.formula, And)):
-                continue
-
+        for obj in proof.shapes.get(And, ()):
             for conjunct in (obj.formula.left, obj.formula.right):
                 if conjunct not in proof.formulas:
                     line = _Line(conjunct, "∧E", (obj.id,))
@@ -207,42 +269,33 @@ class Eliminator:
     @staticmethod
     def ImpE(prover):
         proof = prover.proof
-        for obj in proof.seq:
-            if not (obj.is_line() and isinstance(obj.formula, Imp)):
-                continue
+        for obj in proof.shapes.get(Imp, ()):
             if obj.formula.right in proof.formulas:
                 continue
 
-            for obj2 in proof.seq:
-                if obj2.is_line() and obj2.formula == obj.formula.left:
-                    line = _Line(obj.formula.right, "→E", (obj.id, obj2.id))
-                    proof.add(line)
-                    return True
+            left_id = proof.formulas.get(obj.formula.left)
+            if left_id is not None:
+                line = _Line(obj.formula.right, "→E", (obj.id, left_id))
+                proof.add(line)
+                return True
         return False
 
     @staticmethod
     def IffE(prover):
         proof = prover.proof
-        for obj in proof.seq:
-            if not (obj.is_line() and isinstance(obj.formula, Iff)):
-                continue
+        for obj in proof.shapes.get(Iff, ()):
+            left_id = proof.formulas.get(obj.formula.left)
+            right_id = proof.formulas.get(obj.formula.right)
 
-            have_left = obj.formula.left in proof.formulas
-            have_right = obj.formula.right in proof.formulas
-
-            if have_left and not have_right:
-                for obj2 in proof.seq:
-                    if obj2.is_line() and obj2.formula == obj.formula.left:
-                        line = _Line(obj.formula.right, "↔E", (obj.id, obj2.id))
-                        proof.add(line)
-                        return True
+            if left_id is not None and right_id is None:
+                line = _Line(obj.formula.right, "↔E", (obj.id, left_id))
+                proof.add(line)
+                return True
 
-            if have_right and not have_left:
-                for obj2 in proof.seq:
-                    if obj2.is_line() and obj2.formula == obj.formula.right:
-                        line = _Line(obj.formula.left, "↔E", (obj.id, obj2.id))
-                        proof.add(line)
-                        return True
+            if right_id is not None and left_id is None:
+                line = _Line(obj.formula.left, "↔E", (obj.id, right_id))
+                proof.add(line)
+                return True
         return False
 
     @staticmethod
@@ -251,40 +304,30 @@ class Eliminator:
         goal = proof.goal
         branches = []
 
-        for obj in proof.seq:
-            if not (obj.is_line() and isinstance(obj.formula, Or)):
-                continue
+        for obj in proof.shapes.get(Or, ()):
             disjunct1, disjunct2 = obj.formula.left, obj.formula.right
-            objs = []
 
-            subproof1 = find_subproof(proof.seq, disjunct1, goal)
-            found1 = subproof1 is not None
-
-            if not found1:
-                assumption1 = _Line(disjunct1, "AS", ())
-                subproof1 = _Proof(proof.seq + [assumption1], goal)
-                p1 = Prover(subproof1, prover.seen.copy(), prover.deadline)
-                if not p1.prove(complete):
-                    continue
-                subproof1.seq = subproof1.seq[len(proof.seq):]
-                objs.append(subproof1)
-
-            seq = proof.seq + objs
-            subproof2 = find_subproof(seq, disjunct2, goal)
-            found2 = subproof2 is not None
-
-            if not found2:
-                assumption2 = _Line(disjunct2, "AS", ())
-                subproof2 = _Proof(seq + [assumption2], goal)
-                p2 = Prover(subproof2, prover.seen.copy(), prover.deadline)
-                if not p2.prove(complete):
-                    continue
-                subproof2.seq = subproof2.seq[len(seq):]
+            seen1 = prover.seen.new_child()
+            subproof1, new1 = prove_subproof(
+                prover, proof, disjunct1, goal, seen1, complete
+            )
+            if subproof1 is None:
+                continue
+            objs = [subproof1] if new1 else []
+
+            base = proof.extend(*objs)
+            seen2 = prover.seen.new_child()
+            subproof2, new2 = prove_subproof(
+                prover, base, disjunct2, goal, seen2, complete
+            )
+            if subproof2 is None:
+                continue
+            if new2:
                 objs.append(subproof2)
 
             line = _Line(goal, "∨E", (obj.id, subproof1.id, subproof2.id))
             objs.append(line)
-            branch = _Proof(proof.seq + objs, goal)
+            branch = proof.extend(*objs)
             branches.append(branch)
             if not complete:
                 break
@@ -295,13 +338,14 @@ class Eliminator:
     def NotE_force(prover, complete):
         proof = prover.proof
         branches = []
-        if not is_valid(proof.assumptions, Bot()):
+        # Without a negation to force there is no need for the SAT check
+        if not proof.shapes.get(Not):
+            return False
+        if not _is_valid(proof.assumptions, _bot):
             return False
 
-        for obj in proof.seq:
-            if not (obj.is_line() and isinstance(obj.formula, Not)):
-                continue
-            branch = _Proof(proof.seq, obj.formula.inner)
+        for obj in proof.shapes.get(Not, ()):
+            branch = proof.copy(obj.formula.inner)
             # FIX: prover.seen should be copied (inefficient)
             p = Prover(branch, prover.seen, prover.deadline)
             if not p.prove(complete):
@@ -318,20 +362,18 @@ class Eliminator:
     @staticmethod
     def ImpE_force(prover, complete):
         proof = prover.proof
-        for obj in proof.seq:
-            if not (obj.is_line() and isinstance(obj.formula, Imp)):
-                continue
+        for obj in proof.shapes.get(Imp, ()):
             if obj.formula.right in proof.formulas:
                 continue
 
-            if is_valid(proof.assumptions, obj.formula.left):
-                branch = _Proof(proof.seq, obj.formula.left)
+            if _is_valid(proof.assumptions, obj.formula.left):
+                branch = proof.copy(obj.formula.left)
                 # FIX: prover.seen should be copied (slightly inefficient)
                 p = Prover(branch, prover.seen, prover.deadline)
                 if p.prove(complete):
                     branch.pop_reiteration()
                     if branch.seq != proof.seq:
-                        proof.seq = branch.seq
+                        proof.assign(branch)
                         return True
         return False
 
@@ -340,18 +382,16 @@ class Eliminator:
         proof = prover.proof
         formulas = proof.formulas
 
-        for obj in proof.seq:
-            if not (obj.is_line() and isinstance(obj.formula, Iff)):
-                continue
+        for obj in proof.shapes.get(Iff, ()):
             if obj.formula.left in formulas or obj.formula.right in formulas:
                 continue
-            if not is_valid(proof.assumptions, obj.formula.left):
+            if not _is_valid(proof.assumptions, obj.formula.left):
                 continue
 
             branches = []
             for formula in (obj.formula.left, obj.formula.right):
-                branch = _Proof(proof.seq, formula)
-                p = Prover(branch, prover.seen.copy(), prover.deadline)
+                branch = proof.copy(formula)
+                p = Prover(branch, prover.seen.new_child(), prover.deadline)
                 if not p.prove(complete):
                     continue
 
@@ -371,37 +411,17 @@ class Introducer:
 
     @staticmethod
     def intro(prover, complete):
-        match prover.proof.goal:
-            case Not():
-                return Introducer.NotI(prover, complete)
-            case And():
-                return Introducer.AndI(prover, complete)
-            case Or():
-                return Introducer.OrI(prover, complete)
-            case Imp():
-                return Introducer.ImpI(prover, complete)
-            case Iff():
-                return Introducer.IffI(prover, complete)
-        return False
+        rule = Introducer.rules.get(type(prover.proof.goal))
+        if rule is None:
+            return False
+        return rule(prover, complete)
 
     @staticmethod
     def NotI(prover, complete):
-        proof = prover.proof
-        subproof = find_subproof(proof.seq, proof.goal.inner, Bot())
-        found = subproof is not None
-
-        if not found:
-            assumption = _Line(proof.goal.inner, "AS", ())
-            subproof = _Proof(proof.seq + [assumption], Bot())
-            p = Prover(subproof, prover.seen, prover.deadline)
-            if not p.prove(complete):
-                return False
-            subproof.seq = subproof.seq[len(proof.seq):]
-
-        line = _Line(proof.goal, "¬I", (subproof.id,))
-        objs = (line,) if found else (subproof, line)
-        proof.add(*objs)
-        return True
+        goal = prover.proof.goal
+        return Introducer.solve_in_subproof(
+            prover, goal.inner, _bot, "¬I", complete
+        )
 
     @staticmethod
     def AndI(prover, complete):
@@ -410,14 +430,16 @@ class Introducer:
         branches = []
 
         for conjunct1, conjunct2 in [(left, right), (right, left)]:
-            branch1 = _Proof(proof.seq, conjunct1)
-            p1 = Prover(branch1, prover.seen.copy(), prover.deadline)
+            branch1 = proof.copy(conjunct1)
+            p1 = Prover(branch1, prover.seen.new_child(), prover.deadline)
             if not p1.prove(complete):
                 continue
             conjunct1_id = branch1.pop_reiteration()
 
-            branch2 = _Proof(branch1.seq, conjunct2)
-            p2 = Prover(branch2, prover.seen.copy(), prover.deadline)
+            # branch1 is not used again, so extend it instead of copying
+            branch2 = branch1
+            branch2.goal = conjunct2
+            p2 = Prover(branch2, prover.seen.new_child(), prover.deadline)
             if not p2.prove(complete):
                 continue
             conjunct2_id = branch2.pop_reiteration()
@@ -437,15 +459,17 @@ class Introducer:
         branches = []
 
         # For efficiency
-        for obj in proof.seq:
-            if obj.is_line() and obj.formula in (left, right):
-                line = _Line(proof.goal, "∨I", (obj.id,))
-                proof.add(line)
-                return True
+        ids = [proof.formulas.get(left), proof.formulas.get(right)]
+        ids = [i for i in ids if i is not None]
+        # Ids grow along seq, so the smallest one is the earliest line
+        if ids:
+            line = _Line(proof.goal, "∨I", (min(ids),))
+            proof.add(line)
+            return True
 
         for disjunct in (left, right):
-            if is_valid(proof.assumptions, disjunct):
-                branch = _Proof(proof.seq, disjunct)
+            if _is_valid(proof.assumptions, disjunct):
+                branch = proof.copy(disjunct)
                 # FIX: prover.seen should be copied (inefficient)
                 p = Prover(branch, prover.seen, prover.deadline)
                 if not p.prove(complete):
@@ -462,53 +486,30 @@ class Introducer:
 
     @staticmethod
     def ImpI(prover, complete):
-        proof = prover.proof
-        left, right = proof.goal.left, proof.goal.right
-        subproof = find_subproof(proof.seq, left, right)
-        found = subproof is not None
-
-        if not found:
-            assumption = _Line(left, "AS", ())
-            subproof = _Proof(proof.seq + [assumption], right)
-            p = Prover(subproof, prover.seen, prover.deadline)
-            if not p.prove(complete):
-                return False
-            subproof.seq = subproof.seq[len(proof.seq):]
-
-        line = _Line(proof.goal, "→I", (subproof.id,))
-        objs = (line,) if found else (subproof, line)
-        proof.add(*objs)
-        return True
+        goal = prover.proof.goal
+        return Introducer.solve_in_subproof(
+            prover, goal.left, goal.right, "→I", complete
+        )
 
     @staticmethod
     def IffI(prover, complete):
         proof = prover.proof
         left, right = proof.goal.left, proof.goal.right
-        objs = []
 
-        subproof1 = find_subproof(proof.seq, left, right)
-        found1 = subproof1 is not None
-
-        if not found1:
-            assumption1 = _Line(left, "AS", ())
-            subproof1 = _Proof(proof.seq + [assumption1], right)
-            p1 = Prover(subproof1, prover.seen.copy(), prover.deadline)
-            if not p1.prove(complete):
-                return False
-            subproof1.seq = subproof1.seq[len(proof.seq):]
-            objs.append(subproof1)
-
-        seq = proof.seq + objs
-        subproof2 = find_subproof(seq, right, left)
-        found2 = subproof2 is not None
+        subproof1, new1 = prove_subproof(
+            prover, proof, left, right, prover.seen.new_child(), complete
+        )
+        if subproof1 is None:
+            return False
+        objs = [subproof1] if new1 else []
 
-        if not found2:
-            assumption2 = _Line(right, "AS", ())
-            subproof2 = _Proof(seq + [assumption2], left)
-            p2 = Prover(subproof2, prover.seen.copy(), prover.deadline)
-            if not p2.prove(complete):
-                return False
-            subproof2.seq = subproof2.seq[len(seq):]
+        base = proof.extend(*objs)
+        subproof2, new2 = prove_subproof(
+            prover, base, right, left, prover.seen.new_child(), complete
+        )
+        if subproof2 is None:
+            return False
+        if new2:
             objs.append(subproof2)
 
         line = _Line(proof.goal, "↔I", (subproof1.id, subproof2.id))
@@ -518,31 +519,39 @@ class Introducer:
 
     @staticmethod
     def IP(prover, complete):
-        proof = prover.proof
-        if is_valid([proof.goal], Bot()):
+        goal = prover.proof.goal
+        if _is_valid(frozenset((goal,)), _bot):
             return False
-        subproof = find_subproof(proof.seq, Not(proof.goal), Bot())
-        found = subproof is not None
+        return Introducer.solve_in_subproof(
+            prover, Not(goal), _bot, "IP", complete
+        )
 
-        if not found:
-            assumption = _Line(Not(proof.goal), "AS", ())
-            subproof = _Proof(proof.seq + [assumption], Bot())
-            p = Prover(subproof, prover.seen, prover.deadline)
-            if not p.prove(complete):
-                return False
-            subproof.seq = subproof.seq[len(proof.seq):]
+    @staticmethod
+    def solve_in_subproof(prover, assumption, conclusion, rule, complete):
+        # Closes the goal with a rule citing a single subproof
+        proof = prover.proof
+        subproof, new = prove_subproof(
+            prover, proof, assumption, conclusion, prover.seen, complete
+        )
+        if subproof is None:
+            return False
 
-        line = _Line(proof.goal, "IP", (subproof.id,))
-        objs = (line,) if found else (subproof, line)
+        line = _Line(proof.goal, rule, (subproof.id,))
+        objs = (subproof, line) if new else (line,)
         proof.add(*objs)
         return True
 
+    # Introduction rule for each main connective of the goal
+    rules = {Not: NotI, And: AndI, Or: OrI, Imp: ImpI, Iff: IffI}
+
 
 class Prover:
 
     def __init__(self, proof, seen=None, deadline=None):
         self.proof = proof
-        self.seen = {} if seen is None else seen
+        # Branches layer their own states over a ChainMap instead of
+        # copying everything seen so far
+        self.seen = ChainMap() if seen is None else seen
         self.deadline = deadline
 
     def prove(self, complete):
@@ -564,24 +573,28 @@ class Prover:
             lambda p: Introducer.IP(p, complete),
         )
 
-        branches = []
+        # Run each strategy in place and roll back to this point afterwards
+        branches, size = [], len(self.proof.seq)
+        ip_count = self.proof.ip_count
         for strategy in strategies:
-            p = self.copy()
-            if strategy(p):
-                branches.append(p.proof)
+            # IP adds an IP line, so it cannot beat a branch that avoided one
+            if strategy is strategies[-1] and any(
+                b.ip_count == ip_count for b in branches
+            ):
+                break
+            if strategy(self):
+                branches.append(self.proof.copy())
                 if not complete:
                     break
+            self.proof.truncate(size)
 
         return self.proof.commit_best_branch(branches)
 
-    def copy(self):
-        return Prover(self.proof.copy(), self.seen, self.deadline)
-
     def _enter_state(self):
         proof = self.proof
-        key = (frozenset(proof.assumptions), proof.goal)
+        key = (proof.assumptions, proof.goal)
 
-        cost = (proof.ip_count, proof.line_count)
+        cost = _cost(proof)
         formulas = frozenset(proof.formulas)
 
         prev = self.seen.get(key)
@@ -604,31 +617,29 @@ class Processor:
 
     @staticmethod
     def process(proof):
-        Processor.remove_uncited(proof, proof.id_to_citers())
+        Processor.remove_uncited(proof, set())
         id_to_obj, id_to_citers = proof.id_to_obj(), proof.id_to_citers()
         Processor.replace_reiterations(proof, id_to_obj, id_to_citers, {})
         return Processor.translate(proof, 1, [], {})
 
     @staticmethod
-    def remove_uncited(proof, id_to_citers):
-        while True:
-            seq, n = [], len(proof.seq)
-            for idx, obj in enumerate(proof.seq):
+    def remove_uncited(proof, cited):
+        # Lines only cite earlier lines, so a reverse sweep sees every
+        # citer before the lines it cites
+        seq, n = [], len(proof.seq)
+        for idx in range(n - 1, -1, -1):
+            obj = proof.seq[idx]
 
-                if obj.is_subproof():
-                    Processor.remove_uncited(obj, id_to_citers)
-                    seq.append(obj)
-                    continue
-                if obj.is_assumption or idx == n - 1:
-                    seq.append(obj)
-                    continue
-                if id_to_citers[obj.id]:
-                    seq.append(obj)
+            if obj.is_subproof():
+                Processor.remove_uncited(obj, cited)
+            elif obj.is_assumption or idx == n - 1 or obj.id in cited:
+                cited.update(obj.citations)
+            else:
+                continue
+            seq.append(obj)
 
-            proof.seq = seq
-            if len(seq) == n:
-                break
-            id_to_citers = proof.id_to_citers()
+        seq.reverse()
+        proof.seq = seq
 
     @staticmethod
     def replace_reiterations(proof, id_to_obj, id_to_citers, replace):
@@ -657,26 +668,31 @@ class Processor:
 
     @staticmethod
     def translate(proof, start_idx, context, id_to_idx):
-        seq, idx = [], start_idx
-        for obj in proof.seq:
+        root, idx = Proof([], context), start_idx
+        stack = [(iter(proof.seq), root)]
+        while stack:
+            objs, node = stack[-1]
+            obj = next(objs, None)
+            if obj is None:
+                stack.pop()
+                continue
 
             if obj.is_line():
-                rule = Rules.rules.get(obj.rule) or getattr(Rules, obj.rule)
+                rule = _rules[obj.rule]
                 citations = tuple(id_to_idx[c] for c in obj.citations)
                 j = Justification(rule, citations)
-                seq.append(Line(idx, obj.formula, j))
+                node.seq.append(Line(idx, obj.formula, j))
                 id_to_idx[obj.id] = idx
                 idx += 1
                 continue
 
-            subproof = Processor.translate(obj, idx, context + seq, id_to_idx)
-            seq.append(subproof)
-            new_idx = idx + obj.line_count
-            id_to_idx[obj.id] = (idx, new_idx - 1)
-            idx = new_idx
-
-        return Proof(seq, context)
+            # line_count is cached, so the subproof's range is known upfront
+            id_to_idx[obj.id] = (idx, idx + obj.line_count - 1)
+            subproof = Proof([], node.context + node.seq)
+            node.seq.append(subproof)
+            stack.append((iter(obj.seq), subproof))
 
+        return root
 
 def find_subproof(seq, assumption, conclusion):
     for obj in seq:
@@ -690,6 +706,28 @@ def find_subproof(seq, assumption, conclusion):
     return None
 
 
+def prove_subproof(prover, proof, assumption, conclusion, seen, complete):
+    # Reuses a subproof of proof that already fits, otherwise proves a new
+    # one. Returns the subproof and whether it is new, or (None, False)
+    subproof = find_subproof(proof.seq, assumption, conclusion)
+    if subproof is not None:
+        return subproof, False
+
+    line = _Line(assumption, "AS", ())
+    subproof = proof.extend(line, goal=conclusion)
+    p = Prover(subproof, seen, prover.deadline)
+    if not p.prove(complete):
+        return None, False
+    subproof.seq = subproof.seq[len(proof.seq):]
+    return subproof, True
+
+
+@lru_cache(maxsize=4096)
+def _is_valid(assumptions, formula):
+    # Search revisits the same assumption sets, so remember SAT results
+    return is_valid(assumptions, formula)
+
+
 def prove(premises, conclusion, timeout=3):
     cm = countermodel(premises, conclusion)
     if cm is not None:
@@ -27,6 +27,23 @@ class Metavar:
         return self.value == value
 
 
+def cached_hash(cls):
+    # Formulas are hashed repeatedly as set and dict keys, and the
+    # generated __hash__ recurses through every subformula
+    compute = cls.__hash__
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            h = compute(self)
+            object.__setattr__(self, "_hash", h)
+            return h
+
+    cls.__hash__ = __hash__
+    return cls
+
+
 class Formula:
 
     def __str__(self):
@@ -35,13 +52,19 @@ class Formula:
             return s[1:-1]
         return s
 
+    def __deepcopy__(self, memo):
+        # Formulas are immutable, so they can be shared between copies
+        return self
+
 # TFL
+@cached_hash
 @dataclass(frozen=True)
 class Bot(Formula):
 
     def _str(self):
         return "⊥"
 
+@cached_hash
 @dataclass(frozen=True)
 class Not(Formula):
     inner: Formula
@@ -49,6 +72,7 @@ class Not(Formula):
     def _str(self):
         return f"¬{self.inner._str()}"
 
+@cached_hash
 @dataclass(frozen=True)
 class And(Formula):
     left: Formula
@@ -57,6 +81,7 @@ class And(Formula):
     def _str(self):
         return f"({self.left._str()} ∧ {self.right._str()})"
 
+@cached_hash
 @dataclass(frozen=True)
 class Or(Formula):
     left: Formula
@@ -65,6 +90,7 @@ class Or(Formula):
     def _str(self):
         return f"({self.left._str()} ∨ {self.right._str()})"
 
+@cached_hash
 @dataclass(frozen=True)
 class Imp(Formula):
     left: Formula
@@ -73,6 +99,7 @@ class Imp(Formula):
     def _str(self):
         return f"({self.left._str()} → {self.right._str()})"
 
+@cached_hash
 @dataclass(frozen=True)
 class Iff(Formula):
     left: Formula
@@ -87,6 +114,9 @@ class Term:
     def __str__(self):
         return self._str()
 
+    def __deepcopy__(self, memo):
+        return self
+
 @dataclass(frozen=True)
 class Func(Term):
     name: str
@@ -108,6 +138,7 @@ class Var(Term):
     def _str(self):
         return self.name
 
+@cached_hash
 @dataclass(frozen=True)
 class Pred(Formula):
     name: str
@@ -118,6 +149,7 @@ class Pred(Formula):
             return self.name
         return f"{self.name}({', '.join(str(t) for t in self.args)})"
 
+@cached_hash
 @dataclass(frozen=True)
 class Eq(Formula):
     left: Term
@@ -126,6 +158,7 @@ class Eq(Formula):
     def _str(self):
         return f"{self.left} = {self.right}"
 
+@cached_hash
 @dataclass(frozen=True)
 class Forall(Formula):
     var: Var
@@ -134,6 +167,7 @@ class Forall(Formula):
     def _str(self):
         return f"∀{self.var} {self.inner._str()}"
 
+@cached_hash
 @dataclass(frozen=True)
 class Exists(Formula):
     var: Var
@@ -143,6 +177,7 @@ class Exists(Formula):
         return f"∃{self.var} {self.inner._str()}"
 
 # ML
+@cached_hash
 @dataclass(frozen=True)
 class Box(Formula):
     inner: Formula
@@ -150,6 +185,7 @@ class Box(Formula):
     def _str(self):
         return f"☐{self.inner._str()}"
 
+@cached_hash
 @dataclass(frozen=True)
 class Dia(Formula):
     inner: Formula
@@ -163,6 +199,9 @@ class BoxMarker:
     def __str__(self):
         return "☐"
 
+    def __deepcopy__(self, memo):
+        return self
+
 
 def is_tfl_formula(formula):
     match formula:
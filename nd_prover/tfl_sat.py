@@ -35,6 +35,47 @@ def evaluate(formula, model):
             return False
 
 
+def truth_table(formula, columns, full):
+    # Evaluates formula under every model at once; bit i of the result
+    # is its truth value in model i
+    match formula:
+        case Pred(s, args):
+            return 0 if args else columns[s]
+        case Bot():
+            return 0
+        case Not(a):
+            return full ^ truth_table(a, columns, full)
+        case And(a, b):
+            left = truth_table(a, columns, full)
+            return left & truth_table(b, columns, full)
+        case Or(a, b):
+            left = truth_table(a, columns, full)
+            return left | truth_table(b, columns, full)
+        case Imp(a, b):
+            left = truth_table(a, columns, full)
+            return (full ^ left) | truth_table(b, columns, full)
+        case Iff(a, b):
+            left = truth_table(a, columns, full)
+            return full ^ left ^ truth_table(b, columns, full)
+        case _:
+            return 0
+
+
+def truth_columns(sorted_vars):
+    # Model i assigns var j the bit (n - 1 - j) of i; returns the column
+    # of each var over all 2^n models and the mask of all models
+    n = len(sorted_vars)
+    full = (1 << 2 ** n) - 1
+
+    columns = {}
+    for j, var in enumerate(sorted_vars):
+        run = 1 << (n - 1 - j)
+        period = 2 * run
+        unit = ((1 << run) - 1) << run
+        columns[var] = unit * (full // ((1 << period) - 1))
+    return columns, full
+
+
 def countermodel(premises, conclusion):
     all_vars = set()
     for premise in premises:
@@ -43,18 +84,22 @@ def countermodel(premises, conclusion):
 
     sorted_vars = sorted(all_vars)
     n = len(sorted_vars)
+    columns, full = truth_columns(sorted_vars)
 
-    for i in range(2 ** n):
-        model = {
-            var: bool(i & (1 << (n - 1 - j))) 
-            for j, var in enumerate(sorted_vars)
-        }
-
-        if all(evaluate(p, model) for p in premises):
-            if not evaluate(conclusion, model):
-                return model
+    rows = full
+    for premise in premises:
+        rows &= truth_table(premise, columns, full)
+        if not rows:
+            return None
+    rows &= full ^ truth_table(conclusion, columns, full)
+    if not rows:
+        return None
 
-    return None
+    i = (rows & -rows).bit_length() - 1
+    return {
+        var: bool(i & (1 << (n - 1 - j))) 
+        for j, var in enumerate(sorted_vars)
+    }
 
 
 def is_valid(premises, conclusion):
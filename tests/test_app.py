@@ -0,0 +1,122 @@
+import unittest
+
+import app as app_module
+from app import app
+
+
+def line(n, kind, formula, just=""):
+    return {
+        "lineNumber": n, "kind": kind,
+        "formulaText": formula, "justText": just
+    }
+
+
+PREMISES = [line(1, "premise", "P → Q"), line(2, "premise", "Q → R")]
+
+PROOF = PREMISES + [
+    line(3, "assumption", "P"),
+    line(4, "line", "Q", "→E, 1,3"),
+    line(5, "line", "R", "→E, 2,4"),
+]
+
+EXTENDED = PROOF + [line(6, "close_subproof", "P → R", "→I, 3-5")]
+
+# Same proof with line 4 edited, so every prefix from there on changes
+EDITED = PROOF[:3] + [
+    line(4, "line", "Q", "→E, 2,3"),
+    line(5, "line", "R", "→E, 2,4"),
+]
+
+
+class TestCheckProofCache(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+        app_module._proof_cache.clear()
+
+    def check(self, lines):
+        data = {
+            "logic": "TFL",
+            "premisesText": "P → Q, Q → R",
+            "conclusionText": "P → R",
+            "lines": lines
+        }
+        return self.client.post("/api/check-proof", json=data).get_json()
+
+    def cold(self, lines):
+        app_module._proof_cache.clear()
+        return self.check(lines)
+
+    def test_warm_cache_matches_cold_cache(self):
+        sequence = [PROOF, PROOF, EXTENDED, EDITED, EXTENDED]
+        warm = [self.check(lines) for lines in sequence]
+        cold = [self.cold(lines) for lines in sequence]
+        self.assertEqual(warm, cold)
+
+        self.assertEqual(warm[0]["status"], "incomplete")
+        self.assertEqual(warm[2]["status"], "complete")
+        self.assertFalse(warm[3]["ok"])
+        self.assertIn("Line 4", warm[3]["message"])
+
+    def test_prefix_is_reused(self):
+        self.check(PROOF)
+        payloads = app_module._extract_line_payloads({"lines": EXTENDED})
+        digests = app_module._line_digests(
+            "TFL", "P → Q, Q → R", "P → R", payloads
+        )
+        problem, n = app_module._cached_problem(digests)
+        self.assertEqual(n, len(PROOF))
+        self.assertEqual(len(problem.proof.seq), 1)
+
+    def test_edited_line_invalidates_prefix(self):
+        self.check(PROOF)
+        before, after = (
+            app_module._line_digests(
+                "TFL", "P → Q, Q → R", "P → R",
+                app_module._extract_line_payloads({"lines": lines})
+            )
+            for lines in (PROOF, EDITED)
+        )
+        self.assertEqual(before[:4], after[:4])
+        for i in range(4, len(after)):
+            self.assertNotEqual(before[i], after[i])
+
+        problem, n = app_module._cached_problem(after)
+        # Only the problem and lines before the edited line 4 may match,
+        # and only the full proof was cached
+        self.assertIsNone(problem)
+        self.assertEqual(n, 0)
+
+    def test_cached_problem_is_not_shared(self):
+        self.check(PROOF)
+        payloads = app_module._extract_line_payloads({"lines": PROOF})
+        digests = app_module._line_digests(
+            "TFL", "P → Q, Q → R", "P → R", payloads
+        )
+        problem, _ = app_module._cached_problem(digests)
+        problem.delete_line()
+        self.assertEqual(self.check(PROOF), self.cold(PROOF))
+
+
+class TestLoadJson(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def post(self, body, content_type):
+        response = self.client.post(
+            "/api/validate-problem", data=body, content_type=content_type
+        )
+        return response.get_json()["message"]
+
+    def test_non_json_body_is_left_to_validation(self):
+        message = self.post("logic=TFL", "text/plain")
+        self.assertEqual(message, 'Logic not recognized: "".')
+
+    def test_invalid_json_body(self):
+        self.assertEqual(self.post("{", "application/json"), "Invalid JSON.")
+        self.assertEqual(self.post("[]", "application/json"), "Invalid JSON.")
+
+
+if __name__ == "__main__":
+    unittest.main()
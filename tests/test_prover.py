@@ -0,0 +1,73 @@
+import unittest
+from unittest import mock
+
+from nd_prover import *
+
+
+P, Q, R = (Pred(name, ()) for name in "PQR")
+
+
+def indices(proof):
+    shapes = {k: [obj.id for obj in v] for k, v in proof.shapes.items()}
+    return (
+        proof.formulas, shapes, proof.assumptions,
+        proof.line_count, proof.ip_count
+    )
+
+
+def assert_fresh(test, proof):
+    # A _Proof built from the same seq recomputes every index from scratch
+    fresh = _Proof(proof.seq, proof.goal)
+    test.assertEqual(indices(proof), indices(fresh))
+
+
+class TestProofTruncate(unittest.TestCase):
+
+    def test_truncate_restores_indices(self):
+        premises = [_Line(Imp(P, Q), "PR", ()), _Line(Or(P, R), "PR", ())]
+        proof = _Proof(premises, Q)
+        snapshot = indices(_Proof(proof.seq, proof.goal))
+
+        subproof = proof.extend(_Line(Not(Q), "AS", ()), goal=Bot())
+        subproof.add(
+            _Line(Not(P), "AS", ()),
+            _Line(Bot(), "¬E", (3, 4)),
+            _Line(Q, "IP", ()),
+        )
+        subproof.seq = subproof.seq[len(proof.seq):]
+        proof.add(
+            _Line(P, "AS", ()),
+            _Line(Q, "→E", (1, 3)),
+            subproof,
+            _Line(Q, "IP", (subproof.id,)),
+            _Line(And(Q, Q), "∧I", (4, 4)),
+        )
+        assert_fresh(self, proof)
+
+        for n in range(len(proof.seq) - 1, len(premises) - 1, -1):
+            proof.truncate(n)
+            assert_fresh(self, proof)
+        self.assertEqual(indices(proof), snapshot)
+
+    def test_prove_rolls_back_failed_strategies(self):
+        truncate = _Proof.truncate
+
+        def checked(proof, n):
+            truncate(proof, n)
+            assert_fresh(self, proof)
+
+        problems = [
+            ([Imp(Imp(P, Q), P)], Or(P, Not(P))),
+            ([Or(P, And(Q, R))], And(Or(P, Q), Or(P, R))),
+            ([Not(Iff(P, Q))], Iff(P, Not(Q))),
+            ([], Imp(Imp(Imp(P, Q), P), P)),
+        ]
+        with mock.patch.object(_Proof, "truncate", checked):
+            for premises, conclusion in problems:
+                problem = prove(premises, conclusion)
+                self.assertFalse(problem.errors())
+                self.assertTrue(problem.conclusion_reached())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,117 @@
 import unittest
+from itertools import product
 
 from nd_prover import *
+
+
+def models(sorted_vars):
+    # Enumerates models in the order countermodel used to walk them
+    n = len(sorted_vars)
+    for i in range(2 ** n):
+        yield {
+            var: bool(i & (1 << (n - 1 - j)))
+            for j, var in enumerate(sorted_vars)
+        }
+
+
+def first_countermodel(premises, conclusion):
+    all_vars = set(prop_vars(conclusion))
+    for premise in premises:
+        all_vars |= prop_vars(premise)
+    for model in models(sorted(all_vars)):
+        if all(evaluate(p, model) for p in premises):
+            if not evaluate(conclusion, model):
+                return model
+    return None
+
+
+FORMULAS = [
+    "⊥", "¬⊥", "P", "¬P", "P ∧ Q", "P ∨ Q", "P → Q", "P ↔ Q",
+    "(P → Q) → P", "¬(P ∧ ¬Q) ∨ (R ↔ P)", "((P ↔ Q) ↔ R) → (S ∧ ¬P)",
+    "F(a)", "¬F(a)", "F(a) ∨ P", "F(a) → ⊥",
+]
+
+ARGUMENTS = [
+    ([], "⊥"),
+    ([], "¬⊥"),
+    (["⊥"], "P"),
+    ([], "P ∨ ¬P"),
+    ([], "((P → Q) → P) → P"),
+    (["P → Q", "P"], "Q"),
+    (["P → Q", "Q"], "P"),
+    (["P ∨ Q", "¬P"], "Q"),
+    (["P ∨ Q"], "P ∧ Q"),
+    (["P ↔ Q", "Q ↔ R"], "P ↔ R"),
+    (["P → Q", "R → S"], "(P ∧ R) ↔ (Q ∧ S)"),
+    (["F(a)"], "⊥"),
+    ([], "F(a) → P"),
+    ([], "¬F(a)"),
+]
+
+
+class TestTruthTable(unittest.TestCase):
+
+    def test_bits_match_evaluate(self):
+        for text in FORMULAS:
+            formula = parse_formula(text)
+            sorted_vars = sorted(prop_vars(formula))
+            columns, full = truth_columns(sorted_vars)
+            table = truth_table(formula, columns, full)
+
+            self.assertEqual(full, (1 << 2 ** len(sorted_vars)) - 1)
+            self.assertEqual(table & ~full, 0)
+            for i, model in enumerate(models(sorted_vars)):
+                with self.subTest(formula=text, model=model):
+                    bit = bool(table >> i & 1)
+                    self.assertEqual(bit, bool(evaluate(formula, model)))
+
+    def test_columns_follow_model_order(self):
+        sorted_vars = ["P", "Q", "R"]
+        columns, _ = truth_columns(sorted_vars)
+        rows = list(product((False, True), repeat=3))
+        for j, var in enumerate(sorted_vars):
+            bits = [bool(columns[var] >> i & 1) for i in range(8)]
+            self.assertEqual(bits, [row[j] for row in rows])
+
+    def test_no_variables(self):
+        columns, full = truth_columns([])
+        self.assertEqual((columns, full), ({}, 1))
+        self.assertEqual(truth_table(Bot(), columns, full), 0)
+        self.assertEqual(truth_table(Not(Bot()), columns, full), 1)
+
+    def test_predicates_with_arguments_are_false(self):
+        formula = parse_formula("F(a)")
+        self.assertEqual(prop_vars(formula), set())
+        columns, full = truth_columns([])
+        self.assertEqual(truth_table(formula, columns, full), 0)
+
+
+class TestCountermodel(unittest.TestCase):
+
+    def test_first_countermodel(self):
+        for premises, conclusion in ARGUMENTS:
+            premises = [parse_formula(p) for p in premises]
+            conclusion = parse_formula(conclusion)
+            expected = first_countermodel(premises, conclusion)
+            with self.subTest(premises=premises, conclusion=conclusion):
+                self.assertEqual(countermodel(premises, conclusion), expected)
+                self.assertIs(
+                    is_valid(premises, conclusion), expected is None
+                )
+
+    def test_valid_and_invalid(self):
+        self.assertTrue(is_valid([], parse_formula("¬⊥")))
+        self.assertTrue(is_valid([parse_formula("F(a)")], Bot()))
+        self.assertFalse(is_valid([], Bot()))
+        self.assertEqual(countermodel([], Bot()), {})
+        self.assertEqual(
+            countermodel(
+                [parse_formula("P → Q"), parse_formula("Q")],
+                parse_formula("P")
+            ),
+            {"P": False, "Q": True}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()